@@ -1,36 +1,365 @@
 import asyncio
+import atexit
+import concurrent.futures
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
 
+_CMD = ("RNAfold", "--noPS")
+_NUCLEOTIDES = b"AUGCaugc"
+_MFE_CACHE_SIZE = 16384
+# Seconds to wait for the shared workers to shut down at interpreter exit
+_CLOSE_TIMEOUT = 5
+# "((((....)))) ( -4.20)" - RNAfold prints the structure and energy on one
+# line. Anchored at line starts so the scan skips the sequence echo quickly.
+_MFE_RE = re.compile(rb"^([().]+)\s+\(\s*(-?\d+(?:\.\d+)?)\s*\)", re.M)
+_mfe_search = _MFE_RE.search
 
-class RNArunner:
-    def __init__(self, sequence):
-        cmd = "RNAFold --noPS"
-        self.sequence = sequence
-        self.cmd = cmd
-        self.hash = hash(cmd + sequence)
-        self.proc = asyncio.create_subprocess_shell(
-            cmd,
+
+class RNAFoldError(Exception):
+    pass
+
+
+# With a full executable path and close_fds=False, subprocess can use
+# posix_spawn instead of fork+exec, which avoids copying the page tables of a
+# large parent process. Where posix_spawn is not available it falls back to
+# fork+exec by itself. Python opens fds non-inheritable, so nothing leaks into
+# the child. Windows has no posix_spawn, keep the default there.
+_SPAWN_KWARGS = {"close_fds": False} if os.name == "posix" else {}
+
+
+async def _spawn():
+    # exec rather than shell: no /bin/sh in between and nothing to quote.
+    executable = shutil.which(_CMD[0]) or _CMD[0]
+    try:
+        return await asyncio.create_subprocess_exec(
+            executable,
+            *_CMD[1:],
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            # Nothing reads stderr, a pipe would only cost fds and a reader
+            stderr=asyncio.subprocess.DEVNULL,
+            **_SPAWN_KWARGS,
         )
-        control = sequence + "\n@\n"
-        self.proc.stdin.write(control.encode())
+    except FileNotFoundError as e:
+        raise RNAFoldError(f"{_CMD[0]} not found, is ViennaRNA installed?") from e
+
+
+def _kill(proc):
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+
+
+class RNAFoldWorker:
+    """A long-lived RNAfold process that folds one sequence at a time.
+
+    Sequences are streamed through the same stdin/stdout pipe, so the
+    process start-up cost is only paid once. The terminating ``@`` is only
+    sent when the worker is closed.
+    """
+
+    def __init__(self):
+        self._proc = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_process(self):
+        if self._proc is None or self._proc.returncode is not None:
+            self._proc = await _spawn()
+        return self._proc
+
+    async def fold(self, seq_bytes):
+        async with self._lock:
+            proc = await self._ensure_process()
+            try:
+                try:
+                    proc.stdin.write(seq_bytes + b"\n")
+                    await proc.stdin.drain()
+                    # RNAfold echoes the sequence, then "structure (energy)"
+                    echo = await proc.stdout.readline()
+                    result = await proc.stdout.readline()
+                except (BrokenPipeError, ConnectionResetError):
+                    echo = result = b""
+                if not echo or not result:
+                    await proc.wait()
+                    raise RNAFoldError(
+                        f"RNAfold exited unexpectedly (returncode {proc.returncode})"
+                    )
+                if echo.rstrip() != seq_bytes:
+                    raise RNAFoldError(f"RNAfold output out of sync: {echo[:200]!r}")
+            except BaseException:
+                # Anything that interrupts the exchange, cancellation included,
+                # leaves unread output in the pipe. Drop the process so the
+                # next fold can't read someone else's result.
+                self._proc = None
+                _kill(proc)
+                raise
+        match = _mfe_search(result)
+        if match is None:
+            raise RNAFoldError(f"Could not parse RNAfold output: {result[:200]!r}")
+        return (match.group(1).decode(), float(match.group(2)))
+
+    async def close(self):
+        async with self._lock:
+            proc, self._proc = self._proc, None
+            if proc is None or proc.returncode is not None:
+                return
+            proc.stdin.write(b"@\n")
+            await proc.stdin.drain()
+            proc.stdin.close()
+            await proc.wait()
+
+
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop():
+    # The shared workers all live on one loop in a background thread. Their
+    # pipes belong to that loop, so they outlive any loop of the caller and
+    # this also works from inside an already running loop.
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever, name="cmdrnafold", daemon=True
+            ).start()
+    return _sync_loop
+
+
+def _run_sync(coro):
+    future = asyncio.run_coroutine_threadsafe(coro, _get_sync_loop())
+    try:
+        return future.result()
+    except BaseException:
+        # On Ctrl-C the fold would otherwise keep running and hold the worker
+        future.cancel()
+        raise
+
+
+async def _run_async(coro):
+    loop = _get_sync_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    # Cancelling the wrapper cancels the task on the background loop too
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+# Workers on the background loop, the first one serves RNArunner. Only
+# touched from that loop's thread.
+_pool: "list[RNAFoldWorker]" = []
+
+
+def _get_pool(size):
+    while len(_pool) < size:
+        _pool.append(RNAFoldWorker())
+    return _pool[:size]
+
+
+async def _fold(seq_bytes):
+    return await _get_pool(1)[0].fold(seq_bytes)
+
+
+async def _close_pool():
+    pool = _pool[:]
+    _pool.clear()
+    await asyncio.gather(*(worker.close() for worker in pool))
+
+
+async def fold_compound_close():
+    """Shut down the shared RNAfold workers."""
+    if _sync_loop is not None:
+        await _run_async(_close_pool())
+
+
+# sequence -> (structure, mfe), least recently used first
+_mfe_cache: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+# mfe() runs on the callers' loops, which may sit in different threads
+_mfe_cache_lock = threading.Lock()
+
+
+def clear_mfe_cache():
+    with _mfe_cache_lock:
+        _mfe_cache.clear()
 
-    def mfe(self):
-        # Read the result
-        result = self.proc.stdout.read()
-        # Extract the structure and the mfe number
-        result = result.split("\n")
-        structure = result[7]
-        mfeStr = result[8]
-        # get the number from the string: " minimum free energy =  -9.80 kcal/mol"
-        mfe = float(mfeStr.split(" ")[-2])
-        return (structure, mfe)
+
+def _encode(sequence):
+    # ASCII bytes of a valid sequence, None for anything else.
+    # isascii() is O(1) for str, no need to catch a failed encode.
+    if not isinstance(sequence, str) or not sequence or not sequence.isascii():
+        return None
+    raw = sequence.encode("ascii")
+    # Deleting every valid nucleotide must leave nothing behind
+    return None if raw.translate(None, _NUCLEOTIDES) else raw
+
+
+def validate_many(sequences):
+    """Tell for each sequence whether RNArunner would accept it."""
+    return [_encode(sequence) is not None for sequence in sequences]
+
+
+class RNArunner:
+    __slots__ = ("sequence", "hash", "_seq_bytes")
+    cmd = _CMD
+
+    def __init__(self, sequence):
+        if not isinstance(sequence, str) or not sequence:
+            raise RNAFoldError("Sequence must be a non-empty string")
+        raw = _encode(sequence)
+        if raw is None:
+            raise RNAFoldError(f"Invalid nucleotides in sequence: {sequence!r}")
+        if raw.isupper():
+            # The common case, keep the caller's objects as they are
+            self._seq_bytes = raw
+            self.sequence = sequence
+        else:
+            self._seq_bytes = raw.upper()
+            self.sequence = self._seq_bytes.decode("ascii")
+        # cmd is the same for every runner, the sequence alone identifies it
+        self.hash = hash(self.sequence)
+
+    async def mfe(self):
+        # Keyed on the sequence itself, a hash collision must not return
+        # someone else's structure.
+        with _mfe_cache_lock:
+            result = _mfe_cache.get(self.sequence)
+            if result is not None:
+                _mfe_cache.move_to_end(self.sequence)
+                return result
+        result = await _run_async(_fold(self._seq_bytes))
+        with _mfe_cache_lock:
+            _mfe_cache[self.sequence] = result
+            if len(_mfe_cache) > _MFE_CACHE_SIZE:
+                _mfe_cache.popitem(last=False)
+        return result
 
     def __hash__(self):
         return self.hash
 
+    def __repr__(self):
+        return f"RNArunner({self.sequence!r})"
+
+
+@atexit.register
+def _close_sync_loop():
+    if _sync_loop is None:
+        return
+    future = asyncio.run_coroutine_threadsafe(_close_pool(), _sync_loop)
+    try:
+        # A fold still running in another thread must not hold up the exit
+        future.result(timeout=_CLOSE_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+    _sync_loop.call_soon_threadsafe(_sync_loop.stop)
+
+
+class SyncRNArunner:
+    """Blocking wrapper around RNArunner, like the ViennaRNA fold_compound."""
+
+    __slots__ = ("_runner",)
+
+    def __init__(self, sequence):
+        self._runner = RNArunner(sequence)
+
+    def mfe(self):
+        return _run_sync(self._runner.mfe())
+
+    def __hash__(self):
+        return hash(self._runner)
+
+    def __repr__(self):
+        return f"SyncRNArunner({self._runner.sequence!r})"
+
+
+def _parse_stream(buf):
+    # The scan over the whole buffer runs in the C regex engine, per record
+    # only one decode and one float() are left in Python.
+    return [
+        (structure.decode("ascii"), float(energy))
+        for structure, energy in _MFE_RE.findall(buf)
+    ]
+
+
+async def _feed(stdin, payload):
+    stdin.write(payload)
+    await stdin.drain()
+    stdin.close()
+
+
+async def fold_many(sequences):
+    """Fold all sequences with a single RNAfold run, in submission order."""
+    sequences = [RNArunner(sequence)._seq_bytes for sequence in sequences]
+    if not sequences:
+        return []
+    proc = await _spawn()
+    # Write in the background so big batches can't fill both pipes
+    feeder = asyncio.ensure_future(_feed(proc.stdin, b"\n".join((*sequences, b"@\n"))))
+    results = []
+    pending = b""
+    try:
+        # Parse whatever complete lines have arrived while RNAfold keeps folding
+        while True:
+            chunk = await proc.stdout.read(1 << 16)
+            if not chunk:
+                break
+            complete, _, pending = (pending + chunk).rpartition(b"\n")
+            results.extend(_parse_stream(complete))
+        results.extend(_parse_stream(pending))
+        try:
+            await feeder
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # RNAfold died early, reported through the returncode below
+        await proc.wait()
+    except BaseException:
+        # Cancelled or failed half way, don't leave the run folding unattended
+        feeder.cancel()
+        _kill(proc)
+        await proc.wait()
+        raise
+    if proc.returncode or len(results) != len(sequences):
+        raise RNAFoldError(
+            f"RNAfold returned {len(results)} of {len(sequences)} results "
+            f"(returncode {proc.returncode})"
+        )
+    return results
+
+
+def fold_many_sync(sequences):
+    return _run_sync(fold_many(sequences))
+
+
+async def _fold_parallel(seqs, size):
+    pool = _get_pool(size)
+    return list(
+        await asyncio.gather(*(pool[i % size].fold(seq) for i, seq in enumerate(seqs)))
+    )
+
+
+async def fold_compound_parallel(sequences, workers=None):
+    """Fold sequences round-robin over several long-lived RNAfold workers.
+
+    RNAfold itself is single threaded, so this spreads a batch over up to
+    ``workers`` processes (default: one per CPU). Results are returned in
+    submission order.
+    """
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers!r}")
+    seqs = [RNArunner(sequence)._seq_bytes for sequence in sequences]
+    if not seqs:
+        return []
+    size = min(workers or os.cpu_count() or 1, len(seqs))
+    return await _run_async(_fold_parallel(seqs, size))
+
+
+def fold_compound_parallel_sync(sequences, workers=None):
+    return _run_sync(fold_compound_parallel(sequences, workers))
+
 
 def fold_compound(sequence):
-    # Make a new instance of RNArunner
-    return RNArunner(sequence)
+    # Blocking like the ViennaRNA fold_compound, folds on the shared worker
+    return SyncRNArunner(sequence)
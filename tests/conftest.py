@@ -0,0 +1,124 @@
+import asyncio
+from collections import deque
+from unittest.mock import AsyncMock
+
+import pytest
+
+from cmdrnafold import RNA
+
+
+class RNAFoldSession:
+    """Folds on the package's shared RNAfold worker, one process per session."""
+
+    def fold(self, sequence):
+        return RNA.fold_compound(sequence).mfe()
+
+    def run(self, coro):
+        # Run a coroutine on the loop that owns the shared worker
+        return RNA._run_sync(coro)
+
+
+@pytest.fixture(scope="session")
+def rnafold_worker():
+    session = RNAFoldSession()
+    yield session
+    session.run(RNA.fold_compound_close())
+
+
+@pytest.fixture(scope="session")
+def runner_augc():
+    return RNA.RNArunner("AUGC")
+
+
+@pytest.fixture(scope="session")
+def sync_runner_augc():
+    return RNA.SyncRNArunner("AUGC")
+
+
+class _FakeStdin:
+    def __init__(self):
+        self.written = []
+        self.closed = False
+        self.drain_error = None
+
+    def write(self, data):
+        self.written.append(data)
+
+    def writelines(self, data):
+        self.written.extend(data)
+
+    async def drain(self):
+        if self.drain_error is not None:
+            raise self.drain_error
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeStdout:
+    def __init__(self, data):
+        self.data = deque(data)
+
+    async def readline(self):
+        return self.data.popleft() if self.data else b""
+
+    async def read(self, n=-1):
+        return self.data.popleft() if self.data else b""
+
+
+class _FakeProc:
+    """Just enough of asyncio.subprocess.Process for RNA.py."""
+
+    def __init__(self, returncode, data, exit_code=0):
+        self.returncode = returncode
+        self.exit_code = exit_code
+        self.stdin = _FakeStdin()
+        self.stdout = _FakeStdout(data)
+        self.waited = 0
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+        self.returncode = -9
+
+    async def wait(self):
+        self.waited += 1
+        if self.returncode is None:
+            self.returncode = self.exit_code
+        return self.returncode
+
+
+@pytest.fixture
+def spawn(monkeypatch):
+    """Mocked process spawn, handing out the fake processes in creation order."""
+    procs = deque()
+    mock = AsyncMock(side_effect=lambda *args, **kwargs: procs.popleft())
+    mock.procs = procs
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", mock)
+    return mock
+
+
+@pytest.fixture
+def make_proc(monkeypatch, spawn):
+    """Fake worker process answering readline() with the given lines."""
+    # Tests share one event loop, start each with an empty worker pool
+    monkeypatch.setattr(RNA, "_pool", [])
+
+    def _make(*lines):
+        proc = _FakeProc(None, lines)
+        spawn.procs.append(proc)
+        return proc
+
+    return _make
+
+
+@pytest.fixture
+def make_batch_proc(spawn):
+    """Fake batch process answering read() with the given chunks."""
+
+    def _make(returncode, *chunks):
+        proc = _FakeProc(returncode, chunks)
+        spawn.procs.append(proc)
+        return proc
+
+    return _make
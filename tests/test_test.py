@@ -1,7 +1,325 @@
-# content of test_sample.py
-def inc(x):
-    return x + 1
+import asyncio
+import concurrent.futures
+import os
+import shutil
+import threading
+from unittest.mock import AsyncMock
 
+import pytest
 
-def test_answer():
-    assert inc(3) == 4
+from cmdrnafold import RNA
+from cmdrnafold.RNA import RNAFoldError, RNArunner, SyncRNArunner
+
+_LARGE_SEQ = "AUGC" * 1000
+_VALID_SEQS = (
+    ("AUGC", "AUGC"),
+    ("augc", "AUGC"),
+    ("AuGc", "AUGC"),
+    ("CGCAGGGAUACCCGCG", "CGCAGGGAUACCCGCG"),
+    (_LARGE_SEQ, _LARGE_SEQ),
+    (_LARGE_SEQ.lower(), _LARGE_SEQ),
+)
+_INVALID_SEQS = (
+    ("", "non-empty"),
+    (None, "non-empty"),
+    ("AUGCX", "Invalid"),
+    # A newline or "@" would desync the shared RNAfold pipe
+    ("AUGC\n@", "Invalid"),
+    ("AUGC\nAUGC", "Invalid"),
+    ("AUGC; rm -rf /", "Invalid"),
+    ("AUGC\u03b1", "Invalid"),
+    ("AUGC\u0000", "Invalid"),
+    ("\uff21UGC", "Invalid"),
+    (_LARGE_SEQ + "X", "Invalid"),
+)
+_LONG_OUTPUT = b"x" * 5000 + b"\n"
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    RNA.clear_mfe_cache()
+
+
+class TestRNArunner:
+    @pytest.mark.parametrize("seq,expected", _VALID_SEQS)
+    def test_ctor_valid(self, seq, expected):
+        runner = RNArunner(seq)
+        assert runner.sequence == expected
+        assert hash(runner) == hash(expected)
+
+    @pytest.mark.parametrize("seq,msg", _INVALID_SEQS)
+    def test_ctor_invalid(self, seq, msg):
+        with pytest.raises(RNAFoldError, match=msg):
+            RNArunner(seq)
+
+    def test_validate_many(self):
+        good = ["AUGC" * i for i in range(1, 200)] + [seq for seq, _ in _VALID_SEQS]
+        assert all(RNA.validate_many(good))
+        assert not any(RNA.validate_many([seq for seq, _ in _INVALID_SEQS]))
+        assert RNA.validate_many([]) == []
+
+    def test_cmd(self, runner_augc):
+        assert runner_augc.cmd == ("RNAfold", "--noPS")
+
+    def test_no_instance_dict(self, runner_augc, sync_runner_augc):
+        assert not hasattr(runner_augc, "__dict__")
+        assert not hasattr(sync_runner_augc, "__dict__")
+
+    def test_repr(self, runner_augc):
+        assert repr(runner_augc) == "RNArunner('AUGC')"
+
+
+class TestRNAFoldWorker:
+    async def test_mfe_success(self, make_proc):
+        proc = make_proc(b"CGCAGGGAUACCCGCG\n", b"(((.(((...)))))) ( -5.00)\n")
+        result = await RNArunner("CGCAGGGAUACCCGCG").mfe()
+        await RNA.fold_compound_close()
+        assert result == ("(((.(((...))))))", -5.0)
+        assert b"".join(proc.stdin.written) == b"CGCAGGGAUACCCGCG\n@\n"
+        assert proc.stdin.closed
+
+    async def test_mfe_reuses_process(self, make_proc, runner_augc, spawn):
+        make_proc(b"AUGC\n", b".... (  0.00)\n", b"GGGG\n", b".... (  0.00)\n")
+        await runner_augc.mfe()
+        await RNArunner("GGGG").mfe()
+        await RNA.fold_compound_close()
+        assert spawn.call_count == 1
+
+    @pytest.mark.parametrize(
+        "line,expected",
+        [
+            (b"....  (0.00)\n", ("....", 0.0)),
+            (b"((.)) (-12 )\n", ("((.))", -12.0)),
+        ],
+    )
+    async def test_mfe_parse_variants(self, make_proc, line, expected, runner_augc):
+        make_proc(b"AUGC\n", line)
+        assert await runner_augc.mfe() == expected
+        await RNA.fold_compound_close()
+
+    async def test_mfe_cached(self, make_proc, runner_augc):
+        proc = make_proc(b"AUGC\n", b".... (  0.00)\n")
+        first = await runner_augc.mfe()
+        second = await RNArunner("augc").mfe()
+        await RNA.fold_compound_close()
+        assert first == second == ("....", 0.0)
+        assert b"".join(proc.stdin.written) == b"AUGC\n@\n"
+
+    async def test_mfe_process_died(self, make_proc, runner_augc):
+        dead = make_proc()
+        dead.exit_code = 3
+        make_proc(b"AUGC\n", b".... (  0.00)\n")
+        with pytest.raises(RNAFoldError, match="returncode 3"):
+            await runner_augc.mfe()
+        # The dead process is reaped and replaced right away
+        assert await runner_augc.mfe() == ("....", 0.0)
+        await RNA.fold_compound_close()
+
+    async def test_mfe_cancelled_restarts_process(self, make_proc):
+        slow = make_proc()
+
+        async def hang():
+            await asyncio.sleep(3600)
+
+        slow.stdout.readline = hang
+        make_proc(b"GGGGGGGG\n", b"((....)) ( -1.00)\n")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(RNArunner("AUGC").mfe(), 0.01)
+        # The cancellation reaches the background loop before the next fold
+        assert await RNArunner("GGGGGGGG").mfe() == ("((....))", -1.0)
+        assert slow.killed
+        await RNA.fold_compound_close()
+
+    def test_worker_shared_across_loops(self, make_proc, spawn):
+        proc = make_proc(b"AUGC\n", b".... (  0.00)\n", b"GGGG\n", b".... (  0.00)\n")
+        asyncio.run(RNArunner("AUGC").mfe())
+        # The first loop is closed now, the worker lives on regardless
+        SyncRNArunner("GGGG").mfe()
+        asyncio.run(RNA.fold_compound_close())
+        assert spawn.call_count == 1
+        assert not proc.killed
+        assert proc.stdin.closed
+        assert RNA._pool == []
+
+    async def test_mfe_echo_mismatch(self, make_proc, runner_augc):
+        proc = make_proc(b"GGGG\n", b".... (  0.00)\n")
+        with pytest.raises(RNAFoldError, match="out of sync"):
+            await runner_augc.mfe()
+        assert proc.killed
+        assert "AUGC" not in RNA._mfe_cache
+
+    async def test_mfe_parse_error(self, make_proc, runner_augc):
+        make_proc(b"AUGC\n", b"garbage\n")
+        with pytest.raises(RNAFoldError, match="parse"):
+            await runner_augc.mfe()
+
+    async def test_mfe_parse_error_truncated(self, make_proc, runner_augc):
+        make_proc(b"AUGC\n", _LONG_OUTPUT)
+        with pytest.raises(RNAFoldError) as excinfo:
+            await runner_augc.mfe()
+        assert len(str(excinfo.value)) < 300
+
+
+class TestSyncRNArunner:
+    def test_mfe_sync(self, monkeypatch, sync_runner_augc):
+        monkeypatch.setattr(RNArunner, "mfe", AsyncMock(return_value=("....", 0.0)))
+        assert sync_runner_augc.mfe() == ("....", 0.0)
+
+    def test_mfe_sync_reuses_loop(self, monkeypatch, sync_runner_augc):
+        loops = []
+
+        async def mfe(runner):
+            loops.append(asyncio.get_running_loop())
+            return ("....", 0.0)
+
+        monkeypatch.setattr(RNArunner, "mfe", mfe)
+        sync_runner_augc.mfe()
+        SyncRNArunner("GGGG").mfe()
+        assert loops[0] is loops[1]
+        assert not loops[0].is_closed()
+
+    def test_mfe_sync_interrupted(self, monkeypatch):
+        started = threading.Event()
+        cancelled = threading.Event()
+
+        async def fold():
+            started.set()
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        def interrupted(future, timeout=None):
+            started.wait(5)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(concurrent.futures.Future, "result", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            RNA._run_sync(fold())
+        assert cancelled.wait(5)
+
+    async def test_mfe_sync_inside_running_loop(self, monkeypatch, sync_runner_augc):
+        monkeypatch.setattr(RNArunner, "mfe", AsyncMock(return_value=("....", 0.0)))
+        assert sync_runner_augc.mfe() == ("....", 0.0)
+
+    def test_hash(self, runner_augc, sync_runner_augc):
+        assert hash(sync_runner_augc) == hash(runner_augc)
+
+
+class TestFoldCompound:
+    @pytest.mark.parametrize(
+        "factory,typ,unwrap",
+        [
+            (RNArunner, RNArunner, lambda fc: fc.sequence),
+            (SyncRNArunner, SyncRNArunner, lambda fc: fc._runner.sequence),
+            (RNA.fold_compound, SyncRNArunner, lambda fc: fc._runner.sequence),
+        ],
+    )
+    def test_factories(self, factory, typ, unwrap):
+        fc = factory("augc")
+        assert isinstance(fc, typ)
+        assert unwrap(fc) == "AUGC"
+
+
+class TestFoldMany:
+    def test_fold_many(self, make_batch_proc, spawn):
+        # The second record is split across two reads
+        proc = make_batch_proc(
+            0, b"AUGC\n.... (  0.00)\nGGGCCC\n((..", b")) ( -1.20)\n"
+        )
+        result = RNA.fold_many_sync(["augc", "GGGCCC"])
+        assert result == [("....", 0.0), ("((..))", -1.2)]
+        assert spawn.call_count == 1
+        assert spawn.call_args.args[0] == (shutil.which(RNA._CMD[0]) or RNA._CMD[0])
+        assert spawn.call_args.args[1:] == ("--noPS",)
+        if os.name == "posix":
+            assert spawn.call_args.kwargs["close_fds"] is False
+        else:
+            assert "close_fds" not in spawn.call_args.kwargs
+        assert spawn.call_args.kwargs["stderr"] == asyncio.subprocess.DEVNULL
+        assert b"".join(proc.stdin.written) == b"AUGC\nGGGCCC\n@\n"
+        assert proc.stdin.closed
+        assert proc.waited == 1
+
+    def test_fold_many_missing_results(self, make_batch_proc):
+        proc = make_batch_proc(1)
+        proc.stdin.drain_error = BrokenPipeError()
+        with pytest.raises(RNAFoldError, match="0 of 1"):
+            RNA.fold_many_sync(["AUGC"])
+
+    async def test_fold_many_cancelled(self, make_batch_proc):
+        proc = make_batch_proc(None)
+
+        async def hang(n):
+            await asyncio.sleep(3600)
+
+        proc.stdout.read = hang
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(RNA.fold_many(["AUGC"]), 0.01)
+        assert proc.killed
+        assert proc.waited == 1
+
+    def test_fold_many_empty(self):
+        assert RNA.fold_many_sync([]) == []
+
+
+class TestFoldCompoundParallel:
+    async def test_fold_parallel(self, make_proc, spawn):
+        procs = [
+            make_proc(b"AAAA\n", b".... ( 0.00)\n", b"CCCC\n", b".... ( 1.00)\n"),
+            make_proc(b"GGGG\n", b".... ( 2.00)\n", b"UUUU\n", b".... ( 3.00)\n"),
+        ]
+        result = await RNA.fold_compound_parallel(
+            ["AAAA", "GGGG", "CCCC", "UUUU"], workers=2
+        )
+        await RNA.fold_compound_close()
+        assert result == [
+            ("....", 0.0),
+            ("....", 2.0),
+            ("....", 1.0),
+            ("....", 3.0),
+        ]
+        assert spawn.call_count == 2
+        for proc in procs:
+            assert b"".join(proc.stdin.written).endswith(b"\n@\n")
+
+    def test_fold_parallel_caps_workers(self, make_proc, spawn):
+        make_proc(b"AUGC\n", b".... ( 0.00)\n")
+        result = RNA.fold_compound_parallel_sync(["AUGC"], workers=8)
+        RNA._run_sync(RNA.fold_compound_close())
+        assert result == [("....", 0.0)]
+        assert spawn.call_count == 1
+
+    @pytest.mark.parametrize("workers", [0, -1])
+    def test_fold_parallel_invalid_workers(self, workers):
+        with pytest.raises(ValueError, match="at least 1"):
+            RNA.fold_compound_parallel_sync(["AUGC"], workers=workers)
+
+
+class TestIntegration:
+    pytestmark = [
+        pytest.mark.skipif(
+            shutil.which(RNA._CMD[0]) is None, reason=f"{RNA._CMD[0]} not in PATH"
+        ),
+        # Under xdist, keep all RNAfold tests on one worker and its one process
+        pytest.mark.xdist_group("rnafold"),
+    ]
+
+    def test_real_rnafold_sync(self, rnafold_worker):
+        structure, mfe = rnafold_worker.fold("CGCAGGGAUACCCGCG")
+        assert len(structure) == 16
+        assert set(structure) <= set("().")
+        assert mfe <= 0
+
+    def test_real_rnafold_async(self, rnafold_worker):
+        structure, mfe = rnafold_worker.run(RNArunner("GGGGAAAACCCC").mfe())
+        assert len(structure) == 12
+        assert mfe <= 0
+
+    def test_real_rnafold_concurrent(self, rnafold_worker):
+        # Overlap the RNAfold waits inside one test on the shared loop
+        sequences = ["CGCAGGGAUACCCGCG", "GGGGAAAACCCC", "AUGCAUGC"] * 2
+        results = rnafold_worker.run(RNA.fold_compound_parallel(sequences, workers=2))
+        assert [len(structure) for structure, _ in results] == [16, 12, 8] * 2
+        assert results[:3] == results[3:]